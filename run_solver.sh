@@ -18,7 +18,7 @@ source venv/bin/activate
 
 # Install dependencies
 pip3 install --upgrade pip
-pip3 install numpy
+pip3 install numpy numba
 
 # Run the Tetris Solver
 python3 tetris_solver.py
\ No newline at end of file
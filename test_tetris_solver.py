@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+from tetris_solver import (BOARD_HEIGHT, BOARD_WIDTH, PIECE_ROTATIONS, PIECE_TYPES, ROTATION_SHAPES,
+                           TetrisSolver, _board_hash, _col_tops, _score_placements, new_eval_cache)
+
+def make_solver(rows, **kwargs):
+    """Builds a solver whose board has a filled cell wherever rows[r][c] is '#'."""
+    solver = TetrisSolver(verbose=False, **kwargs)
+    solver.col_masks = np.array([sum(1 << r for r in range(BOARD_HEIGHT) if rows[r][c] == "#")
+                                 for c in range(BOARD_WIDTH)], dtype=np.uint32)
+    solver.col_tops = _col_tops(solver.col_masks)
+    solver.board_hash = np.uint64(_board_hash(solver.col_masks))
+    return solver
+
+def random_rows(rng):
+    """Random rows, denser towards the floor, over 4 bottom rows that are full but for an open well."""
+    well = rng.integers(BOARD_WIDTH)
+    rows = ["".join("#" if c != well and rng.random() < r / BOARD_HEIGHT * 0.6 else "."
+                    for c in range(BOARD_WIDTH))
+            for r in range(BOARD_HEIGHT - 4)]
+    return rows + ["#" * well + "." + "#" * (BOARD_WIDTH - 1 - well)] * 4
+
+def test_score_placements_matches_evaluate_board():
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        rows = random_rows(rng)
+        solver = make_solver(rows)
+        drop_xs = np.empty(BOARD_WIDTH, dtype=np.int64)
+        scores = np.empty(BOARD_WIDTH, dtype=np.float64)
+        for piece_type in PIECE_TYPES:
+            first_rot, num_rots = PIECE_ROTATIONS[piece_type]
+            for r_idx in range(num_rots):
+                _score_placements(solver.col_masks, solver.col_tops, solver.board_hash, new_eval_cache(),
+                                  first_rot + r_idx, drop_xs, scores, False, False)
+                for y in range(BOARD_WIDTH - ROTATION_SHAPES[first_rot + r_idx, 1] + 1):
+                    # Slide down from the top row until the piece would collide
+                    x = 0 if solver.can_place(piece_type, r_idx, 0, y) else -1
+                    while x >= 0 and solver.can_place(piece_type, r_idx, x + 1, y):
+                        x += 1
+                    assert drop_xs[y] == x
+                    if x < 0:
+                        assert scores[y] == -np.inf
+                        continue
+                    placed = make_solver(rows)
+                    assert placed.place_piece(piece_type, r_idx, x, y)
+                    assert scores[y] == placed.evaluate_board()
+
+def test_best_move_when_next_piece_cannot_fit():
+    # Rows 0-1 are open only in columns 0-1 and rows 2-19 only in column 9: an O fits, a second O does not
+    rows = ["..########"] * 2 + ["#########."] * 18
+    for parallel in (True, False):
+        solver = make_solver(rows, parallel=parallel)
+        assert not solver.game_over()
+        assert solver.best_move("O") == ((0, 0, 0), -200)
+        assert solver.best_move("O", "O") == ((0, 0, 0), -200)
+
+def test_rotation_index_out_of_range():
+    solver = TetrisSolver(verbose=False)
+    for call in (lambda: solver.place_piece("I", 2, 18, 0), lambda: solver.can_place("Z", 5, 0, 0),
+                 lambda: solver.drop_piece("O", 1, 0), lambda: solver.print_board_with_piece("T", -1, 0, 0)):
+        with pytest.raises(IndexError):
+            call()
+    assert not solver.col_masks.any()
+
+def test_eval_cache_does_not_change_moves():
+    piece_ids = np.random.default_rng(0).integers(0, len(PIECE_TYPES), size=201)
+    for parallel in (True, False):
+        cached = TetrisSolver(verbose=False, parallel=parallel)
+        uncached = TetrisSolver(verbose=False, parallel=parallel)
+        for turn in range(200):
+            # Odd turns search without the preview, so their moves come straight from the cached root scores
+            piece_type, next_piece_type = PIECE_TYPES[piece_ids[turn]], PIECE_TYPES[piece_ids[turn + 1]]
+            if turn % 2:
+                next_piece_type = None
+            uncached.eval_cache = new_eval_cache()
+            move = cached.best_move(piece_type, next_piece_type)
+            assert uncached.best_move(piece_type, next_piece_type) == move
+            if move[0] is None:
+                break
+            for solver in (cached, uncached):
+                x, y, r_idx = move[0]
+                solver.place_piece(piece_type, r_idx, x, y)
+                solver.clear_lines()
+
+def test_clear_lines_shifts_rows_above_each_full_row():
+    rows = (["." * BOARD_WIDTH] * (BOARD_HEIGHT - 5) +
+            ["#.........", "##########", ".###.####.", "##########", "#.#.#.#.#."])
+    solver = make_solver(rows)
+    assert solver.clear_lines() == 2
+    expected = ["." * BOARD_WIDTH] * (BOARD_HEIGHT - 3) + ["#.........", ".###.####.", "#.#.#.#.#."]
+    assert (solver.board_cells() == [[cell == "#" for cell in row] for row in expected]).all()
+    assert (solver.score, solver.lines_cleared) == (300, 2)
+    assert (solver.col_tops == _col_tops(solver.col_masks)).all()
+    assert solver.board_hash == _board_hash(solver.col_masks)
+    assert solver.clear_lines() == 0
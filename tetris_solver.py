@@ -1,192 +1,544 @@
 import numpy as np
-import random
+import sys
 import time
+from numba import njit, prange
+from numba.extending import intrinsic
 
 # Tetris Constants
 BOARD_WIDTH = 10
 BOARD_HEIGHT = 20
+FULL_COLUMN = (1 << BOARD_HEIGHT) - 1  # Column bitmask with every row filled
 LINE_CLEAR_POINTS = {
     1: 100,   # Single line
     2: 300,   # Double
     3: 500,   # Triple
     4: 800    # Tetris
 }
+GLYPHS = np.array([" ", "█", "▒"])  # Empty, board and piece cells
+BOARD_BORDER = "+" + "-" * BOARD_WIDTH + "+"
+EVAL_CACHE_SIZE = 1 << 16  # Slots in the direct-mapped evaluation cache, a power of two
+
+def format_board(cells):
+    """Returns a (BOARD_HEIGHT, BOARD_WIDTH) grid of GLYPHS indices as a bordered multi-line string."""
+    rows = ["|" + "".join(row) + "|" for row in GLYPHS[cells]]
+    return "\n".join([BOARD_BORDER, *rows, BOARD_BORDER]) + "\n"
 
 def get_rotations(piece):
     """Return a list of unique rotations for the given tetromino piece."""
     rotations = []
+    seen = set()
     for i in range(4):
-        rotated = np.rot90(piece, i)
-        # Check for duplicate rotations
-        if not any(np.array_equal(rotated, r) for r in rotations):
+        rotated = np.ascontiguousarray(np.rot90(piece, i))
+        # Check for duplicate rotations by shape and cell bytes
+        key = (rotated.shape, rotated.tobytes())
+        if key not in seen:
+            seen.add(key)
             rotations.append(rotated)
     return rotations
 
 # Define tetromino base shapes
 BASE_TETROMINOS = {
-    'I': np.array([[1, 1, 1, 1]]),
+    'I': np.array([[1, 1, 1, 1]], dtype=np.int8),
     'O': np.array([[1, 1],
-                   [1, 1]]),
+                   [1, 1]], dtype=np.int8),
     'T': np.array([[0, 1, 0],
-                   [1, 1, 1]]),
+                   [1, 1, 1]], dtype=np.int8),
     'L': np.array([[0, 0, 1],
-                   [1, 1, 1]]),
+                   [1, 1, 1]], dtype=np.int8),
     'J': np.array([[1, 0, 0],
-                   [1, 1, 1]]),
+                   [1, 1, 1]], dtype=np.int8),
     'S': np.array([[0, 1, 1],
-                   [1, 1, 0]]),
+                   [1, 1, 0]], dtype=np.int8),
     'Z': np.array([[1, 1, 0],
-                   [0, 1, 1]])
+                   [0, 1, 1]], dtype=np.int8)
 }
 
 # Precompute all rotations for each tetromino
 TETROMINOS = { k: get_rotations(shape) for k, shape in BASE_TETROMINOS.items() }
 
+# Piece ids index this list; run_game draws pieces as ids
+PIECE_TYPES = list(TETROMINOS.keys())
+
+# Filled-cell (di, dj) offsets of each rotation, in row-major order
+PIECE_OFFSETS = { k: [np.argwhere(piece).astype(np.int8) for piece in rotations]
+                  for k, rotations in TETROMINOS.items() }
+
+def get_column_masks(offsets):
+    """Return the column bitmasks of a piece at x = 0, bit i set when piece row i is filled."""
+    columns = [0] * 4
+    for di, dj in offsets:
+        columns[dj] |= 1 << int(di)
+    return columns
+
+def pack_rotations():
+    """
+    Packs every rotation of every tetromino into flat arrays usable from JIT-compiled code.
+    Returns (shapes, offsets, columns, index): shapes[rot] is (piece_h, piece_w), offsets[rot] holds
+    the (di, dj) of its 4 filled cells, columns[rot, j] is the bitmask of piece column j at x = 0
+    (zero padded to 4 columns), and index maps each piece type to the (first, count) range of its
+    rotations.
+    """
+    shapes, offsets, columns, index = [], [], [], {}
+    for piece_type, rotations in TETROMINOS.items():
+        index[piece_type] = (len(shapes), len(rotations))
+        for piece, piece_offsets in zip(rotations, PIECE_OFFSETS[piece_type]):
+            shapes.append(piece.shape)
+            offsets.append(piece_offsets)
+            columns.append(get_column_masks(piece_offsets))
+    return (np.array(shapes, dtype=np.int8), np.array(offsets),
+            np.array(columns, dtype=np.uint32), index)
+
+ROTATION_SHAPES, ROTATION_OFFSETS, PIECE_COLUMNS, PIECE_ROTATIONS = pack_rotations()
+
+def get_rotation(piece_type, r_idx):
+    """Maps rotation r_idx of a piece to its packed rotation index, raising IndexError if out of range."""
+    first_rot, num_rots = PIECE_ROTATIONS[piece_type]
+    if not 0 <= r_idx < num_rots:
+        raise IndexError(f"{piece_type} has no rotation {r_idx} (it has {num_rots})")
+    return first_rot + r_idx
+
+def get_top_masks():
+    """Returns the board column masks of every (rotation, y) spawned at x = 0, one row per placement."""
+    top_masks = []
+    for rot, (piece_h, piece_w) in enumerate(ROTATION_SHAPES):
+        for y in range(BOARD_WIDTH - piece_w + 1):
+            spawn = np.zeros(BOARD_WIDTH, dtype=np.uint32)
+            spawn[y:y + piece_w] = PIECE_COLUMNS[rot, :piece_w]
+            top_masks.append(spawn)
+    return np.array(top_masks)
+
+TOP_MASKS = get_top_masks()
+
+def get_column_profiles():
+    """
+    Returns (top_profile, bottom_profile): the highest and lowest filled row of each column
+    of every rotation, indexed [rot, j] and padded with -1 past the piece width.
+    """
+    top_profile = np.full((len(ROTATION_SHAPES), 4), -1, dtype=np.int8)
+    bottom_profile = np.full((len(ROTATION_SHAPES), 4), -1, dtype=np.int8)
+    for rot, offsets in enumerate(ROTATION_OFFSETS):
+        # Offsets are row-major, so the first cell seen in a column is its top one
+        for di, dj in offsets:
+            if top_profile[rot, dj] < 0:
+                top_profile[rot, dj] = di
+            bottom_profile[rot, dj] = di
+    return top_profile, bottom_profile
+
+TOP_PROFILE, BOTTOM_PROFILE = get_column_profiles()
+
+# Zobrist keys: a board hashes to the XOR of the keys of its filled cells
+ZOBRIST = np.random.default_rng(0).integers(0, 2**63, size=(BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint64)
+
+@njit(cache=True)
+def _can_place(col_masks, rot, x, y):
+    """Checks if rotation rot can be placed at (x, y) without collision."""
+    # Check horizontal bounds
+    if y < 0 or y + ROTATION_SHAPES[rot, 1] > BOARD_WIDTH:
+        return False
+    # Check vertical bounds
+    if x < 0 or x + ROTATION_SHAPES[rot, 0] > BOARD_HEIGHT:
+        return False
+    # Every rotation is padded to 4 columns; padding columns are empty, so clamping their board index is harmless
+    last_col = BOARD_WIDTH - 1
+    return not (
+        (col_masks[y] & (PIECE_COLUMNS[rot, 0] << x)) |
+        (col_masks[min(y + 1, last_col)] & (PIECE_COLUMNS[rot, 1] << x)) |
+        (col_masks[min(y + 2, last_col)] & (PIECE_COLUMNS[rot, 2] << x)) |
+        (col_masks[min(y + 3, last_col)] & (PIECE_COLUMNS[rot, 3] << x))
+    )
+
+@njit(cache=True)
+def _place_piece(col_masks, rot, x, y):
+    """ORs rotation rot into the board at (x, y); the caller checks it fits."""
+    for j in range(ROTATION_SHAPES[rot, 1]):
+        col_masks[y + j] |= PIECE_COLUMNS[rot, j] << x
+
+@njit(cache=True)
+def _undo_piece(col_masks, rot, x, y):
+    """XORs rotation rot back out of the board at (x, y), undoing _place_piece."""
+    for j in range(ROTATION_SHAPES[rot, 1]):
+        col_masks[y + j] ^= PIECE_COLUMNS[rot, j] << x
+
+@intrinsic
+def _ctpop(typingctx, value):
+    """Counts the set bits of an integer with LLVM's ctpop, a single popcnt instruction where available."""
+    def codegen(context, builder, signature, args):
+        return builder.ctpop(args[0])
+    return value(value), codegen
+
+@njit(cache=True)
+def _popcount(value):
+    """Counts the set bits of a non-negative board mask."""
+    return _ctpop(np.int64(value))
+
+@njit(cache=True)
+def _col_tops(col_masks):
+    """Returns the topmost filled row of each column, BOARD_HEIGHT for empty columns."""
+    col_tops = np.full(BOARD_WIDTH, BOARD_HEIGHT, dtype=np.int8)
+    for col in range(BOARD_WIDTH):
+        mask = np.int64(col_masks[col])
+        if mask:
+            # The lowest set bit is the topmost filled row; count the zeros below it
+            col_tops[col] = _popcount((mask & -mask) - 1)
+    return col_tops
+
+@njit(cache=True)
+def _lower_tops(col_tops, rot, x, y):
+    """Updates col_tops for rotation rot placed at (x, y)."""
+    for j in range(ROTATION_SHAPES[rot, 1]):
+        col_tops[y + j] = min(col_tops[y + j], x + TOP_PROFILE[rot, j])
+
+@njit(cache=True)
+def _drop_x(col_masks, col_tops, rot, y):
+    """Returns the row x where rotation rot lands when dropped at column y, or -1 if it cannot enter."""
+    # The piece rests on whichever column top its lowest cell in that column meets first
+    x = BOARD_HEIGHT
+    for j in range(ROTATION_SHAPES[rot, 1]):
+        x = min(x, col_tops[y + j] - 1 - BOTTOM_PROFILE[rot, j])
+    if x >= 0:
+        return x
+    # Part of the piece spawns below a column top; drop it cell by cell as it may still fit
+    if not _can_place(col_masks, rot, 0, y):
+        return -1
+    x = 0
+    while _can_place(col_masks, rot, x + 1, y):
+        x += 1
+    return x
+
+@njit(cache=True)
+def _board_hash(col_masks):
+    """Computes the Zobrist hash of a board from scratch."""
+    board_hash = np.uint64(0)
+    for col in range(BOARD_WIDTH):
+        for row_idx in range(BOARD_HEIGHT):
+            if col_masks[col] >> row_idx & 1:
+                board_hash ^= ZOBRIST[row_idx, col]
+    return board_hash
+
+def get_piece_hashes():
+    """Returns the Zobrist hash of every rotation at every (x, y) it fits at, indexed [rot, x, y]."""
+    hashes = np.zeros((len(ROTATION_SHAPES), BOARD_HEIGHT, BOARD_WIDTH), dtype=np.uint64)
+    for rot, (piece_h, piece_w) in enumerate(ROTATION_SHAPES):
+        di, dj = ROTATION_OFFSETS[rot].T
+        xs = np.arange(BOARD_HEIGHT - piece_h + 1)[:, None, None]
+        ys = np.arange(BOARD_WIDTH - piece_w + 1)[None, :, None]
+        hashes[rot, :xs.shape[0], :ys.shape[1]] = np.bitwise_xor.reduce(ZOBRIST[xs + di, ys + dj], axis=2)
+    return hashes
+
+# Placing or removing a piece flips the board hash by PIECE_HASHES[rot, x, y]
+PIECE_HASHES = get_piece_hashes()
+
+def new_eval_cache():
+    """
+    Creates an empty direct-mapped cache of board evaluations as (hashes, scores) arrays: a board
+    with Zobrist hash h lives in slot h % EVAL_CACHE_SIZE, evicting whatever was there. Hash 0 is
+    the empty board, which is never looked up, so zeroed slots read as empty.
+    """
+    return np.zeros(EVAL_CACHE_SIZE, dtype=np.uint64), np.zeros(EVAL_CACHE_SIZE, dtype=np.float64)
+
+@njit(cache=True)
+def _combine_features(lines_cleared, holes, bumpiness, agg_height):
+    """Combines board features into an evaluation score."""
+    return (
+        lines_cleared * 500 +
+        (4 - lines_cleared) * -50 +
+        holes * -50 +
+        bumpiness * -10 +
+        agg_height * -1
+    )
+
+@njit(cache=True)
+def _evaluate_board(col_masks, col_tops):
+    """Evaluates board state based on features such as holes and bumpiness."""
+    full_rows = FULL_COLUMN
+    holes = 0
+    bumpiness = 0
+    agg_height = 0
+    for col in range(BOARD_WIDTH):
+        full_rows &= col_masks[col]
+        height = BOARD_HEIGHT - col_tops[col]
+        # Every empty cell between the column top and the floor is a hole
+        holes += height - _popcount(np.int64(col_masks[col]))
+        agg_height += height
+        if col > 0:
+            bumpiness += abs(col_tops[col] - col_tops[col - 1])
+    return _combine_features(_popcount(full_rows), holes, bumpiness, agg_height)
+
+@njit(cache=True)
+def _score_placements(col_masks, col_tops, board_hash, eval_cache, rot, drop_xs, scores, read_cache, write_cache):
+    """
+    Drops rotation rot at every column offset y at once, writing the landing row to drop_xs[y] and the
+    _evaluate_board score of the resulting board to scores[y] (-1 and -inf where it does not fit).
+    Features of the board without the piece are computed once and shared by every candidate, which
+    then only re-scores the columns it covers and the bumpiness at their edges. Scores are looked up
+    in eval_cache by the Zobrist hash of the resulting board when read_cache is set, and stored there
+    when write_cache is set.
+    """
+    cached_hashes, cached_scores = eval_cache
+    # Per-column features of the current board, plus prefix/suffix ANDs to find full rows
+    column_holes = np.empty(BOARD_WIDTH, dtype=np.int64)
+    prefix_full = np.empty(BOARD_WIDTH + 1, dtype=np.int64)
+    suffix_full = np.empty(BOARD_WIDTH + 1, dtype=np.int64)
+    prefix_full[0] = FULL_COLUMN
+    suffix_full[BOARD_WIDTH] = FULL_COLUMN
+    base_holes = 0
+    base_bumpiness = 0
+    base_agg_height = 0
+    for col in range(BOARD_WIDTH):
+        column_holes[col] = BOARD_HEIGHT - col_tops[col] - _popcount(np.int64(col_masks[col]))
+        base_holes += column_holes[col]
+        base_agg_height += BOARD_HEIGHT - col_tops[col]
+        if col > 0:
+            base_bumpiness += abs(col_tops[col] - col_tops[col - 1])
+        prefix_full[col + 1] = prefix_full[col] & col_masks[col]
+        suffix_full[BOARD_WIDTH - 1 - col] = suffix_full[BOARD_WIDTH - col] & col_masks[BOARD_WIDTH - 1 - col]
+    
+    piece_w = ROTATION_SHAPES[rot, 1]
+    new_tops = np.empty(piece_w, dtype=np.int64)
+    for y in range(BOARD_WIDTH - piece_w + 1):
+        x = _drop_x(col_masks, col_tops, rot, y)
+        drop_xs[y] = x
+        if x < 0:
+            scores[y] = -np.inf
+            continue
+        placed_hash = board_hash ^ PIECE_HASHES[rot, x, y]
+        slot = placed_hash & (EVAL_CACHE_SIZE - 1)
+        if read_cache and cached_hashes[slot] == placed_hash:
+            scores[y] = cached_scores[slot]
+            continue
+        holes = base_holes
+        agg_height = base_agg_height
+        full_rows = prefix_full[y] & suffix_full[y + piece_w]
+        for j in range(piece_w):
+            col = y + j
+            new_mask = np.int64(col_masks[col]) | (np.int64(PIECE_COLUMNS[rot, j]) << x)
+            new_tops[j] = min(col_tops[col], x + TOP_PROFILE[rot, j])
+            holes += BOARD_HEIGHT - new_tops[j] - _popcount(new_mask) - column_holes[col]
+            agg_height += col_tops[col] - new_tops[j]
+            full_rows &= new_mask
+        # Only the height steps inside and at the edges of the covered columns change
+        bumpiness = base_bumpiness
+        for col in range(max(y, 1), min(y + piece_w + 1, BOARD_WIDTH)):
+            left = new_tops[col - 1 - y] if col - 1 >= y else col_tops[col - 1]
+            right = new_tops[col - y] if col < y + piece_w else col_tops[col]
+            bumpiness += abs(right - left) - abs(col_tops[col] - col_tops[col - 1])
+        scores[y] = _combine_features(_popcount(full_rows), holes, bumpiness, agg_height)
+        if write_cache:
+            cached_hashes[slot] = placed_hash
+            cached_scores[slot] = scores[y]
+
+@njit(cache=True)
+def _score_child(col_masks, col_tops, board_hash, eval_cache, rot, x, y, next_first_rot, next_num_rots,
+                 write_cache):
+    """
+    Places rotation rot at (x, y) and returns the best score over every placement of the next piece
+    on top of it (-inf when the next piece no longer fits), storing those evaluations in eval_cache
+    when write_cache is set. col_masks and col_tops are restored before returning.
+    """
+    piece_w = ROTATION_SHAPES[rot, 1]
+    saved_tops = col_tops[y:y + piece_w].copy()
+    _place_piece(col_masks, rot, x, y)
+    _lower_tops(col_tops, rot, x, y)
+    child_hash = board_hash ^ PIECE_HASHES[rot, x, y]
+    drop_xs = np.empty(BOARD_WIDTH, dtype=np.int64)
+    scores = np.empty(BOARD_WIDTH, dtype=np.float64)
+    best_score = -np.inf
+    for r_idx in range(next_num_rots):
+        next_rot = next_first_rot + r_idx
+        _score_placements(col_masks, col_tops, child_hash, eval_cache, next_rot, drop_xs, scores,
+                          False, write_cache)
+        for next_y in range(BOARD_WIDTH - ROTATION_SHAPES[next_rot, 1] + 1):
+            best_score = max(best_score, scores[next_y])
+    _undo_piece(col_masks, rot, x, y)
+    col_tops[y:y + piece_w] = saved_tops
+    return best_score
+
+@njit(parallel=True, cache=True)
+def _score_children(col_masks, col_tops, board_hash, eval_cache, first_rot, move_x, move_y, move_r_idx,
+                    num_moves, next_first_rot, next_num_rots, child_scores):
+    """
+    Writes _score_child of each placement k of the current piece to child_scores[k]. Placements are
+    independent, so they are spread across threads; each works on its own copy of the board and
+    eval_cache is not touched.
+    """
+    for k in prange(num_moves):
+        child_scores[k] = _score_child(col_masks.copy(), col_tops.copy(), board_hash, eval_cache,
+                                       first_rot + move_r_idx[k], move_x[k], move_y[k],
+                                       next_first_rot, next_num_rots, False)
+
+@njit(cache=True)
+def _best_move(col_masks, col_tops, board_hash, eval_cache, first_rot, num_rots, next_first_rot, next_num_rots,
+               depth, parallel):
+    """
+    Exhaustively searches placements of the current piece (rotations first_rot .. first_rot + num_rots - 1)
+    and, when depth is 2, of the next piece on top of each one, across threads if parallel is set.
+    Returns (best_x, best_y, rotation_index, score), with rotation_index -1 when nothing fits.
+    """
+    # Collect every landing spot of the current piece together with its static evaluation
+    max_moves = num_rots * BOARD_WIDTH
+    move_x = np.empty(max_moves, dtype=np.int64)
+    move_y = np.empty(max_moves, dtype=np.int64)
+    move_r_idx = np.empty(max_moves, dtype=np.int64)
+    static_scores = np.empty(max_moves, dtype=np.float64)
+    drop_xs = np.empty(BOARD_WIDTH, dtype=np.int64)
+    rotation_scores = np.empty(BOARD_WIDTH, dtype=np.float64)
+    num_moves = 0
+    for r_idx in range(num_rots):
+        rot = first_rot + r_idx
+        _score_placements(col_masks, col_tops, board_hash, eval_cache, rot, drop_xs, rotation_scores,
+                          True, False)
+        for y in range(BOARD_WIDTH - ROTATION_SHAPES[rot, 1] + 1):
+            if drop_xs[y] < 0:
+                continue
+            move_x[num_moves], move_y[num_moves], move_r_idx[num_moves] = drop_xs[y], y, r_idx
+            static_scores[num_moves] = rotation_scores[y]
+            num_moves += 1
+    
+    # The 1-ply choice, which is also kept when no placement leaves room for the next piece
+    best_score = -np.inf
+    best_move = -1
+    for k in range(num_moves):
+        if static_scores[k] > best_score:
+            best_score = static_scores[k]
+            best_move = k
+    if depth > 1 and num_moves > 0:
+        static_move, static_score = best_move, best_score
+        best_score = -np.inf
+        best_move = -1
+        child_scores = np.empty(num_moves, dtype=np.float64)
+        if parallel:
+            _score_children(col_masks, col_tops, board_hash, eval_cache, first_rot, move_x, move_y, move_r_idx,
+                            num_moves, next_first_rot, next_num_rots, child_scores)
+        else:
+            for k in range(num_moves):
+                child_scores[k] = _score_child(col_masks, col_tops, board_hash, eval_cache,
+                                               first_rot + move_r_idx[k], move_x[k], move_y[k],
+                                               next_first_rot, next_num_rots, False)
+        for k in range(num_moves):
+            if child_scores[k] > best_score:
+                best_score = child_scores[k]
+                best_move = k
+        if best_move < 0:
+            best_move, best_score = static_move, static_score
+        else:
+            # Next turn's root placements are this move's children, as long as it clears no lines
+            _score_child(col_masks, col_tops, board_hash, eval_cache, first_rot + move_r_idx[best_move],
+                         move_x[best_move], move_y[best_move], next_first_rot, next_num_rots, True)
+    if best_move < 0:
+        return -1, -1, -1, best_score
+    return move_x[best_move], move_y[best_move], move_r_idx[best_move], best_score
+
+# Pay the JIT compilation cost once at import instead of on the first turn
+_best_move(np.zeros(BOARD_WIDTH, dtype=np.uint32), np.full(BOARD_WIDTH, BOARD_HEIGHT, dtype=np.int8),
+           np.uint64(0), new_eval_cache(), 0, 1, 0, 1, 2, False)
+
 class TetrisSolver:
-    def __init__(self):
-        self.board = np.zeros((BOARD_HEIGHT, BOARD_WIDTH), dtype=int)
+    def __init__(self, verbose=True, parallel=False):
+        self.verbose = verbose  # Print line clears; off for benchmark and training runs
+        self.parallel = parallel  # Score the lookahead ply across threads (opt-in)
+        # One uint32 bitmask per column, bit i set when row i is filled (row 0 is the top)
+        self.col_masks = np.zeros(BOARD_WIDTH, dtype=np.uint32)
+        self.col_tops = np.full(BOARD_WIDTH, BOARD_HEIGHT, dtype=np.int8)  # Topmost filled row per column
+        self.board_hash = np.uint64(0)  # Zobrist hash of the board, kept in sync on every change
+        self.eval_cache = new_eval_cache()
         self.score = 0
         self.lines_cleared = 0
         self.level = 1
     
-    def can_place(self, piece, x, y):
-        """Checks if a piece can be placed at (x, y) without collision."""
-        piece_h, piece_w = piece.shape
-        # Check horizontal bounds
-        if y < 0 or y + piece_w > BOARD_WIDTH:
-            return False
-        # Check vertical bounds
-        if x + piece_h > BOARD_HEIGHT:
-            return False
-        
-        for i in range(piece_h):
-            for j in range(piece_w):
-                if piece[i, j] == 1:
-                    if self.board[x + i, y + j] == 1:
-                        return False
-        return True
+    def can_place(self, piece_type, r_idx, x, y):
+        """Checks if rotation r_idx of a piece can be placed at (x, y) without collision."""
+        return _can_place(self.col_masks, get_rotation(piece_type, r_idx), x, y)
     
-    def place_piece(self, piece, x, y):
-        """Places a piece on the board."""
-        if not self.can_place(piece, x, y):
+    def place_piece(self, piece_type, r_idx, x, y):
+        """Places rotation r_idx of a piece on the board."""
+        rot = get_rotation(piece_type, r_idx)
+        if not _can_place(self.col_masks, rot, x, y):
             return False
-        piece_h, piece_w = piece.shape
-        for i in range(piece_h):
-            for j in range(piece_w):
-                if piece[i, j] == 1:
-                    self.board[x + i, y + j] = 1
+        _place_piece(self.col_masks, rot, x, y)
+        _lower_tops(self.col_tops, rot, x, y)
+        self.board_hash ^= PIECE_HASHES[rot, x, y]
         return True
     
     def clear_lines(self):
         """Clears completed lines and returns the number of lines cleared."""
-        full_rows = np.all(self.board == 1, axis=1)
-        num_cleared = np.sum(full_rows)
+        full_rows = int(np.bitwise_and.reduce(self.col_masks))  # Bit i set when row i is full
+        num_cleared = full_rows.bit_count()
         if num_cleared > 0:
-            new_board = np.zeros_like(self.board)
-            new_idx = BOARD_HEIGHT - 1
-            for idx in range(BOARD_HEIGHT - 1, -1, -1):
-                if not full_rows[idx]:
-                    new_board[new_idx] = self.board[idx]
-                    new_idx -= 1
-            self.board = new_board
+            # Remove each full row from every column, top to bottom, shifting the rows above it down
+            col_masks = self.col_masks
+            for row_idx in range(BOARD_HEIGHT):
+                if full_rows >> row_idx & 1:
+                    above = (1 << row_idx) - 1
+                    below = FULL_COLUMN ^ ((1 << (row_idx + 1)) - 1)
+                    col_masks = ((col_masks & above) << 1) | (col_masks & below)
+            self.col_masks = col_masks
+            self.col_tops = _col_tops(self.col_masks)
+            self.board_hash = np.uint64(_board_hash(self.col_masks))
             self.lines_cleared += num_cleared
             self.level = max(1, self.lines_cleared // 10 + 1)
             if 1 <= num_cleared <= 4:
                 points = LINE_CLEAR_POINTS[num_cleared] * self.level
                 self.score += points
-                print(f"Cleared {num_cleared} lines! +{points} points")
+                if self.verbose:
+                    print(f"Cleared {num_cleared} lines! +{points} points")
             else:
                 points = 1000 * self.level * num_cleared // 4
                 self.score += points
-                print(f"Cleared {num_cleared} lines! +{points} points")
+                if self.verbose:
+                    print(f"Cleared {num_cleared} lines! +{points} points")
         return num_cleared
     
     def evaluate_board(self):
         """Evaluates board state based on features such as holes and bumpiness."""
-        full_rows = np.all(self.board == 1, axis=1)
-        lines_cleared = np.sum(full_rows)
-        
-        column_heights = []
-        holes = 0
-        for col in range(BOARD_WIDTH):
-            filled = np.where(self.board[:, col] == 1)[0]
-            if filled.size > 0:
-                height = BOARD_HEIGHT - filled[0]
-                column_heights.append(height)
-                holes += sum(1 for row in range(filled[0]+1, BOARD_HEIGHT) if self.board[row, col] == 0)
-            else:
-                column_heights.append(0)
-        bumpiness = sum(abs(column_heights[i] - column_heights[i+1]) for i in range(len(column_heights)-1))
-        agg_height = sum(column_heights)
-        
-        # Combine features into an evaluation score
-        return (
-            lines_cleared * 500 +
-            (4 - lines_cleared) * -50 +
-            holes * -50 +
-            bumpiness * -10 +
-            agg_height * -1
-        )
-    
-    def best_move(self, rotations):
+        return _evaluate_board(self.col_masks, self.col_tops)
+    
+    def best_move(self, piece_type, next_piece_type=None):
         """
         Finds the best move for the tetromino by considering every unique rotation and every valid column.
+        When next_piece_type is given, each move is scored by the best placement of the next piece on top of it.
         Returns (best_x, best_y, rotation_index) and its evaluation score.
         """
-        best_score = -np.inf
-        best_move = None
-        for r_idx, piece in enumerate(rotations):
-            piece_h, piece_w = piece.shape
-            for y in range(0, BOARD_WIDTH - piece_w + 1):
-                x = 0
-                if not self.can_place(piece, x, y):
-                    continue
-                # Drop piece using gravity
-                while self.can_place(piece, x + 1, y):
-                    x += 1
-                # Evaluate the board after placing piece at (x,y)
-                backup_board = self.board.copy()
-                self.place_piece(piece, x, y)
-                score = self.evaluate_board()
-                self.board = backup_board  # Undo move
-                if score > best_score:
-                    best_score = score
-                    best_move = (x, y, r_idx)
-        return best_move, best_score
-    
-    def drop_piece(self, piece, y_pos):
+        first_rot, num_rots = PIECE_ROTATIONS[piece_type]
+        if next_piece_type is None:
+            next_first_rot, next_num_rots, depth = first_rot, num_rots, 1
+        else:
+            (next_first_rot, next_num_rots), depth = PIECE_ROTATIONS[next_piece_type], 2
+        best_x, best_y, best_r_idx, best_score = _best_move(self.col_masks, self.col_tops, self.board_hash,
+                                                            self.eval_cache, first_rot, num_rots,
+                                                            next_first_rot, next_num_rots,
+                                                            depth, self.parallel)
+        if best_r_idx < 0:
+            return None, best_score
+        return (best_x, best_y, best_r_idx), int(best_score)
+    
+    def drop_piece(self, piece_type, r_idx, y_pos):
         """Drops a piece from the top to the lowest valid position at y_pos."""
-        x = 0
-        while self.can_place(piece, x + 1, y_pos):
-            x += 1
-        return self.place_piece(piece, x, y_pos)
+        rot = get_rotation(piece_type, r_idx)
+        if not 0 <= y_pos <= BOARD_WIDTH - ROTATION_SHAPES[rot, 1]:
+            return False
+        x = _drop_x(self.col_masks, self.col_tops, rot, y_pos)
+        return self.place_piece(piece_type, r_idx, x, y_pos)
+    
+    def board_cells(self, col_masks=None):
+        """Returns the board (or the given column masks) as a (BOARD_HEIGHT, BOARD_WIDTH) 0/1 grid."""
+        if col_masks is None:
+            col_masks = self.col_masks
+        return (col_masks[None, :] >> np.arange(BOARD_HEIGHT)[:, None]) & 1
     
     def print_board(self):
         """Prints the current state of the board."""
-        print("\nCurrent Board:")
-        print("+" + "-" * BOARD_WIDTH + "+")
-        for row in self.board:
-            line = "|" + "".join("█" if cell else " " for cell in row) + "|"
-            print(line)
-        print("+" + "-" * BOARD_WIDTH + "+")
-    
-    def print_board_with_piece(self, piece, x, y):
+        sys.stdout.write("\nCurrent Board:\n" + format_board(self.board_cells()))
+    
+    def print_board_with_piece(self, piece_type, r_idx, x, y):
         """Prints the board with a piece overlaid at position (x,y)."""
-        if not self.can_place(piece, x, y):
+        rot = get_rotation(piece_type, r_idx)
+        if not _can_place(self.col_masks, rot, x, y):
             print("Cannot place piece at this position!")
             return
-        vis_board = self.board.copy()
-        piece_h, piece_w = piece.shape
-        for i in range(piece_h):
-            for j in range(piece_w):
-                if piece[i, j] == 1:
-                    vis_board[x + i, y + j] = 2  # Mark the piece cells with a 2
-        print("\nBoard with Piece (█ = Board, ▒ = Piece):")
-        print("+" + "-" * BOARD_WIDTH + "+")
-        for row in vis_board:
-            line = "|" + "".join("█" if cell == 1 else ("▒" if cell == 2 else " ") for cell in row) + "|"
-            print(line)
-        print("+" + "-" * BOARD_WIDTH + "+")
+        piece_masks = np.zeros_like(self.col_masks)
+        _place_piece(piece_masks, rot, x, y)
+        cells = self.board_cells() + 2 * self.board_cells(piece_masks)  # Mark the piece cells with a 2
+        sys.stdout.write("\nBoard with Piece (█ = Board, ▒ = Piece):\n" + format_board(cells))
     
     def print_game_info(self):
         """Prints current game information."""
@@ -194,57 +546,64 @@ class TetrisSolver:
     
     def game_over(self):
         """Checks if the game is over (i.e. no piece can be placed at the top row for any rotation)."""
-        for rotations in TETROMINOS.values():
-            for piece in rotations:
-                for y in range(BOARD_WIDTH - piece.shape[1] + 1):
-                    if self.can_place(piece, 0, y):
-                        return False
-        return True
+        # Every spawn position collides with some column
+        return bool(np.all(np.any(self.col_masks & TOP_MASKS, axis=1)))
 
-def run_game(max_turns=100, delay=0.5):
-    """Runs the Tetris game simulation for a specified number of turns."""
-    solver = TetrisSolver()
-    piece_types = list(TETROMINOS.keys())
+def run_game(max_turns=100, delay=0.5, verbose=True, seed=None, parallel=False):
+    """
+    Runs the Tetris game simulation for a specified number of turns and returns the solver.
+    With verbose=False nothing is printed, for benchmark and training runs; a fixed seed
+    replays the same piece sequence, and parallel scores the lookahead ply across threads.
+    """
+    solver = TetrisSolver(verbose=verbose, parallel=parallel)
+    # Draw the whole piece sequence up front, plus one extra piece for the last preview
+    piece_ids = np.random.default_rng(seed).integers(0, len(PIECE_TYPES), size=max_turns + 1, dtype=np.int8)
     turn = 0
     
-    print("Starting Tetris Solver Game...")
-    print("Each piece will be automatically placed in its optimal drop position.")
-    solver.print_game_info()
-    solver.print_board()
+    if verbose:
+        print("Starting Tetris Solver Game...")
+        print("Each piece will be automatically placed in its optimal drop position.")
+        solver.print_game_info()
+        solver.print_board()
     
     while turn < max_turns and not solver.game_over():
-        # Select random piece type
-        piece_type = random.choice(piece_types)
-        rotations = TETROMINOS[piece_type]
-        print(f"\n--- Turn {turn + 1} ---")
-        print(f"Next Piece: {piece_type}")
+        # Take the next piece of the sequence, keeping one piece of preview for the lookahead
+        piece_type, next_piece_type = PIECE_TYPES[piece_ids[turn]], PIECE_TYPES[piece_ids[turn + 1]]
+        if verbose:
+            print(f"\n--- Turn {turn + 1} ---")
+            print(f"Next Piece: {piece_type} (then {next_piece_type})")
         
-        best_move_info, eval_score = solver.best_move(rotations)
+        best_move_info, eval_score = solver.best_move(piece_type, next_piece_type)
         if best_move_info:
             best_x, best_y, best_r_idx = best_move_info
-            chosen_piece = rotations[best_r_idx]
-            print(f"Best Position: {(best_x, best_y)} with rotation index {best_r_idx} (Eval: {eval_score})")
-            solver.print_board_with_piece(chosen_piece, best_x, best_y)
-            solver.place_piece(chosen_piece, best_x, best_y)
+            if verbose:
+                print(f"Best Position: {(best_x, best_y)} with rotation index {best_r_idx} (Eval: {eval_score})")
+                solver.print_board_with_piece(piece_type, best_r_idx, best_x, best_y)
+            solver.place_piece(piece_type, best_r_idx, best_x, best_y)
             solver.clear_lines()
             solver.score += 10  # Bonus for placing a piece
-            solver.print_game_info()
-            solver.print_board()
+            if verbose:
+                solver.print_game_info()
+                solver.print_board()
             turn += 1
-            time.sleep(delay)
+            if delay > 0:
+                time.sleep(delay)
         else:
-            print("Game Over! No valid moves available.")
+            if verbose:
+                print("Game Over! No valid moves available.")
             break
     
-    if solver.game_over():
-        print("\nGame Over! No more valid moves.")
-    elif turn >= max_turns:
-        print(f"\nReached maximum turns ({max_turns}).")
-    
-    print("\nFinal Results:")
-    solver.print_game_info()
-    solver.print_board()
-    print("Thank you for playing!")
+    if verbose:
+        if solver.game_over():
+            print("\nGame Over! No more valid moves.")
+        elif turn >= max_turns:
+            print(f"\nReached maximum turns ({max_turns}).")
+        
+        print("\nFinal Results:")
+        solver.print_game_info()
+        solver.print_board()
+        print("Thank you for playing!")
+    return solver
 
 if __name__ == "__main__":
     run_game(max_turns=10000, delay=0)